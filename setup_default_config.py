@@ -5,9 +5,118 @@ This ensures first-time users have proper default settings.
 """
 
 import os
-import json
 import sys
-from datetime import datetime
+
+# Colour of each default event and state type, in display order; they fill
+# the config template below and are listed when a config is created
+DEFAULT_EVENT_TYPES = (("Start", "green"), ("Stop", "red"), ("Error", "orange"))
+DEFAULT_STATE_TYPES = (("Recording", "blue"), ("Paused", "yellow"), ("Processing", "purple"))
+
+def _render_type_map(types):
+    """Render (name, colour) pairs as a JSON object nested one level at indent=2"""
+    lines = ",\n".join(f'    "{name}": "{colour}"' for name, colour in types)
+    return f"{{\n{lines}\n  }}".encode('utf-8')
+
+# Default configuration as pre-rendered JSON (json.dumps(..., indent=2));
+# the type maps are spliced in at import, the __TS__ placeholder at write time
+DEFAULT_CONFIG_TEMPLATE = b"""{
+  "app_name": "HP Py Sleep",
+  "version": "1.0.0",
+  "created_by": "setup_default_config.py",
+  "created_timestamp": "__TS__",
+  "window_geometry": "",
+  "selected_signals": [],
+  "event_types": __EVENT_TYPES__,
+  "state_types": __STATE_TYPES__,
+  "trace_assignments": {},
+  "saved_montages": [],
+  "last_montage_name": null,
+  "last_h5_path_var": "",
+  "auto_output": false,
+  "load_mode": "all",
+  "max_samples": "1000",
+  "autoscale": "resize",
+  "anti_alias": false,
+  "remove_dc": false,
+  "window_size": "5 min",
+  "use_icons": true,
+  "dark_mode": false,
+  "note": "This configuration file was created by the HP Py Sleep setup script"
+}
+""".replace(
+    b"__EVENT_TYPES__", _render_type_map(DEFAULT_EVENT_TYPES)).replace(
+    b"__STATE_TYPES__", _render_type_map(DEFAULT_STATE_TYPES))
+
+# Multi-line console output, each emitted with a single write()
+BANNER_START = "=" * 60 + "\n⚙️  HP Py Sleep - Configuration Setup\n" + "=" * 60 + "\n\n"
+
+BANNER_SUCCESS = (
+    "\n🎉 Configuration setup completed successfully!\n"
+    "HP Py Sleep will now use the default configuration on first launch.\n"
+)
+
+BANNER_FAILURE = (
+    "\n❌ Configuration setup failed!\n"
+    "You may need to run with appropriate permissions.\n"
+)
+
+def render_default_config():
+    """Return the default configuration bytes stamped with the current time"""
+    from datetime import datetime
+    
+    timestamp = datetime.now().isoformat().encode('ascii')
+    return DEFAULT_CONFIG_TEMPLATE.replace(b"__TS__", timestamp, 1)
+
+def full_fsync(fd):
+    """Flush a file to stable storage (F_FULLFSYNC on macOS, fsync elsewhere)"""
+    try:
+        import fcntl
+        fcntl.fcntl(fd, fcntl.F_FULLFSYNC)
+    except (ImportError, AttributeError, OSError):
+        os.fsync(fd)
+
+def write_new_file_atomic(path, data):
+    """Atomically create path containing data; return False if it already exists
+    
+    The data is written and synced to a sibling temp file which is then
+    published in one step, so readers never see a partially written file.
+    On filesystems without hard links the file is instead created in place,
+    which is not atomic; if that write fails the partial file is removed
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            full_fsync(f.fileno())
+        
+        # link() refuses to replace an existing file, unlike os.replace()
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # Filesystem without hard links (e.g. SMB, exFAT); an exclusive
+            # create still never overwrites a file that appeared meanwhile
+            try:
+                f = open(path, 'xb')
+            except FileExistsError:
+                return False
+            try:
+                with f:
+                    f.write(data)
+                    f.flush()
+                    full_fsync(f.fileno())
+            except BaseException:
+                # A torn config would otherwise be "preserved" by every later run
+                os.unlink(path)
+                raise
+        return True
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
 
 def create_default_config():
     """Create default configuration file if it doesn't exist"""
@@ -19,90 +128,65 @@ def create_default_config():
     
     print(f"Checking configuration file: {config_file}")
     
-    # Create config directory if it doesn't exist
-    if not os.path.exists(config_dir):
-        print(f"Creating Application Support directory: {config_dir}")
-        os.makedirs(config_dir, exist_ok=True)
-        print(f"✅ Created directory: {config_dir}")
-    else:
-        print(f"✅ Directory exists: {config_dir}")
+    # makedirs is a no-op when the directory already exists
+    os.makedirs(config_dir, exist_ok=True)
+    print(f"✅ Using directory: {config_dir}")
     
     # Check if config file already exists
     if os.path.exists(config_file):
         print(f"✅ Configuration file already exists: {config_file}")
         print("ℹ️  Preserving existing configuration")
         
-        # Optionally show current event/state types
-        try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-            
-            if 'event_types' in config:
-                event_types = list(config['event_types'].keys())
-                print(f"   Current event types: {', '.join(event_types)}")
-            
-            if 'state_types' in config:
-                state_types = list(config['state_types'].keys())
-                print(f"   Current state types: {', '.join(state_types)}")
+        # Show current event/state types only when asked; it costs a read and parse
+        if os.environ.get('HP_SETUP_VERBOSE'):
+            try:
+                with open(config_file, 'rb') as f:
+                    data = f.read()
                 
-        except Exception as e:
-            print(f"   Note: Could not read existing config: {e}")
+                try:
+                    import orjson
+                    config = orjson.loads(data)
+                except ImportError:
+                    import json
+                    config = json.loads(data)
+                
+                if 'event_types' in config:
+                    event_types = list(config['event_types'].keys())
+                    print(f"   Current event types: {', '.join(event_types)}")
+                
+                if 'state_types' in config:
+                    state_types = list(config['state_types'].keys())
+                    print(f"   Current state types: {', '.join(state_types)}")
+                    
+            except Exception as e:
+                print(f"   Note: Could not read existing config: {e}")
         
         return True
     
     # Create default configuration
     print(f"📝 Creating default configuration file...")
     
-    default_config = {
-        "app_name": "HP Py Sleep",
-        "version": "1.0.0",
-        "created_by": "setup_default_config.py",
-        "created_timestamp": datetime.now().isoformat(),
-        "window_geometry": "",
-        "selected_signals": [],
-        "event_types": {
-            "Start": "green",
-            "Stop": "red",
-            "Error": "orange"
-        },
-        "state_types": {
-            "Recording": "blue",
-            "Paused": "yellow",
-            "Processing": "purple"
-        },
-        "trace_assignments": {},
-        "saved_montages": [],
-        "last_montage_name": None,
-        "last_h5_path_var": "",
-        "auto_output": False,
-        "load_mode": "all",
-        "max_samples": "1000",
-        "autoscale": "resize",
-        "anti_alias": False,
-        "remove_dc": False,
-        "window_size": "5 min",
-        "use_icons": True,
-        "dark_mode": False,
-        "note": "This configuration file was created by the HP Py Sleep setup script"
-    }
+    # Rendered once; the template below is written from the same bytes
+    payload = render_default_config()
     
     try:
-        with open(config_file, 'w') as f:
-            json.dump(default_config, f, indent=2)
+        if not write_new_file_atomic(config_file, payload):
+            print(f"✅ Configuration file already exists: {config_file}")
+            print("ℹ️  Preserving existing configuration")
+            return True
         
         print(f"✅ Created default configuration: {config_file}")
-        print(f"   Default event types: {', '.join(default_config['event_types'].keys())}")
-        print(f"   Default state types: {', '.join(default_config['state_types'].keys())}")
+        print(f"   Default event types: {', '.join(name for name, _ in DEFAULT_EVENT_TYPES)}")
+        print(f"   Default state types: {', '.join(name for name, _ in DEFAULT_STATE_TYPES)}")
         
         # Also create the template file for future use
         template_file = os.path.join(config_dir, "default_config_template.json")
         if not os.path.exists(template_file):
             print(f"📝 Creating config template for future resets...")
             try:
-                with open(template_file, 'w') as f:
-                    json.dump(default_config, f, indent=2)
-                print(f"✅ Created template: {template_file}")
-                print(f"   You can edit this template to customize default settings")
+                if write_new_file_atomic(template_file, payload):
+                    print(f"✅ Created template: {template_file}")
+                    print(f"   You can edit this template to customize default settings")
             except Exception as e:
                 print(f"   ⚠️  Could not create template: {e}")
         
@@ -114,10 +198,7 @@ def create_default_config():
 
 def main():
     """Main function"""
-    print("============================================================")
-    print("⚙️  HP Py Sleep - Configuration Setup")
-    print("============================================================")
-    print("")
+    sys.stdout.write(BANNER_START)
     
     # Check if we're on macOS
     if sys.platform != "darwin":
@@ -125,18 +206,14 @@ def main():
         print("The configuration file path assumes macOS Application Support structure.")
         return 1
     
-    print("📱 Detected macOS system")
-    print("")
+    sys.stdout.write("📱 Detected macOS system\n\n")
     
     success = create_default_config()
     
-    print("")
     if success:
-        print("🎉 Configuration setup completed successfully!")
-        print("HP Py Sleep will now use the default configuration on first launch.")
+        sys.stdout.write(BANNER_SUCCESS)
     else:
-        print("❌ Configuration setup failed!")
-        print("You may need to run with appropriate permissions.")
+        sys.stdout.write(BANNER_FAILURE)
         return 1
     
     return 0
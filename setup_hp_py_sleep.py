@@ -9,30 +9,442 @@ Usage:
     python setup_hp_py_sleep.py
 """
 
+import io
 import os
+import stat
 import sys
-import requests
 import json
-import zipfile
-import tempfile
-import shutil
-from pathlib import Path
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 # GitHub repository information
 GITHUB_REPO = "stafne/hp_sleep_mac"
 GITHUB_API_BASE = "https://api.github.com"
 
-def get_latest_release():
-    """Get information about the latest release from GitHub."""
+# Multi-line console output, each emitted with a single write()
+BANNER_START = "=" * 60 + "\n🚀 HP Py Sleep - First Time Setup\n" + "=" * 60 + "\n\n"
+
+SETUP_PLAN = "\n".join([
+    "📋 This script will:",
+    "   1. Download the latest HP Py Sleep release from GitHub",
+    "   2. Install it to your Applications folder",
+    "   3. Set up default configuration file (if needed)",
+    "   4. Prepare the application for first-time use",
+    "",
+    "",
+])
+
+BANNER_COMPLETE = "\n".join([
+    "",
+    "=" * 60,
+    "🎉 Setup Completed Successfully!",
+    "=" * 60,
+    "",
+    "📱 HP Py Sleep has been installed to your Applications folder.",
+    "🔍 You can find it by:",
+    "   - Opening Finder",
+    "   - Going to Applications",
+    "   - Looking for 'HP Py Sleep'",
+    "",
+    "🚀 To launch the application:",
+    "   - Double-click the app in Applications, or",
+    "   - Use Spotlight (Cmd+Space) and search for 'HP Py Sleep'",
+    "",
+    "🔄 Future updates:",
+    "   - The app will automatically check for updates on startup",
+    "   - You can manually check for updates from within the app",
+    "",
+    "📚 For more information, visit:",
+    f"   https://github.com/{GITHUB_REPO}",
+    "",
+    "",
+])
+
+# Colour of each default event and state type, in display order; they fill
+# the config template below and are listed when a config is created
+DEFAULT_EVENT_TYPES = (("Start", "green"), ("Stop", "red"), ("Error", "orange"))
+DEFAULT_STATE_TYPES = (("Recording", "blue"), ("Paused", "yellow"), ("Processing", "purple"))
+
+def _render_type_map(types):
+    """Render (name, colour) pairs as a JSON object nested one level at indent=2."""
+    lines = ",\n".join(f'    "{name}": "{colour}"' for name, colour in types)
+    return f"{{\n{lines}\n  }}".encode('utf-8')
+
+# Default configuration as pre-rendered JSON (json.dumps(..., indent=2));
+# the type maps are spliced in at import, the __TS__ placeholder at write time
+DEFAULT_CONFIG_TEMPLATE = b"""{
+  "app_name": "HP Py Sleep",
+  "version": "1.0.0",
+  "created_by": "setup_hp_py_sleep.py",
+  "created_timestamp": "__TS__",
+  "window_geometry": "",
+  "selected_signals": [],
+  "event_types": __EVENT_TYPES__,
+  "state_types": __STATE_TYPES__,
+  "trace_assignments": {},
+  "saved_montages": [],
+  "last_montage_name": null,
+  "last_h5_path_var": "",
+  "auto_output": false,
+  "load_mode": "all",
+  "max_samples": "1000",
+  "autoscale": "resize",
+  "anti_alias": false,
+  "remove_dc": false,
+  "window_size": "5 min",
+  "use_icons": true,
+  "dark_mode": false,
+  "note": "This configuration file was created by the HP Py Sleep setup script"
+}
+""".replace(
+    b"__EVENT_TYPES__", _render_type_map(DEFAULT_EVENT_TYPES)).replace(
+    b"__STATE_TYPES__", _render_type_map(DEFAULT_STATE_TYPES))
+
+# Download tuning
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+PROGRESS_INTERVAL = 0.25  # seconds between progress redraws
+RANGE_BLOCK_SIZE = 2 << 20  # 2 MiB per HTTP range request
+RANGE_CACHE_BLOCKS = 32  # blocks kept in memory while extracting
+RANGE_TAIL_SIZE = 64 * 1024  # end-of-archive bytes fetched up front
+RANGE_READ_AHEAD = 2  # blocks fetched in the background ahead of the reader
+RANGE_RETRIES = 3  # attempts per block before the streaming install gives up
+
+# (connect, read) timeouts in seconds
+API_TIMEOUT = (10, 30)
+DOWNLOAD_TIMEOUT = (10, 300)
+
+# Created on first use by get_session(); requests, zipfile, shutil and
+# tempfile are likewise imported only by the functions that need them so
+# the platform check and confirmation prompt don't pay for loading them
+_session = None
+
+def run_in_background(fn, *args):
+    """Call fn(*args) on a daemon thread and return a Future for its result.
+    
+    Unlike ThreadPoolExecutor workers, daemon threads are not joined at
+    interpreter exit, so declining the prompt or pressing Ctrl-C ends the
+    script at once even while a request is still in flight.
+    """
+    future = Future()
+    
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def get_session():
+    """Return the pooled requests session shared by the API call and the download.
+    
+    Repeated requests to the same host reuse the keep-alive connection and TLS session.
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        session.headers.update({'Accept-Encoding': 'gzip', 'User-Agent': 'hp-py-sleep-setup/1.0'})
+        _session = session
+    return _session
+
+class RangedHTTPFile(io.RawIOBase):
+    """Seekable, read-only view of a remote file backed by HTTP Range requests.
+    
+    ZipFile reads the central directory at the end of the archive first and
+    then only the bytes of each member it extracts, so installing can start
+    without waiting for the whole asset. Reads are served from a small LRU of
+    fixed-size blocks so ZipFile's many small reads don't each become a request.
+    
+    The next few blocks are fetched on background threads, so the network
+    keeps working while ZipFile (which reads under its own lock) consumes the
+    current one. Each block is retried before giving up; only the background
+    threads back off between attempts, never a reader holding ZipFile's lock.
+    The first block that fails for good sets ``fetch_failed`` and every later
+    read raises at once, so the caller can fall back to a full download.
+    """
+    
+    def __init__(self, url, size, block_size=RANGE_BLOCK_SIZE, max_blocks=RANGE_CACHE_BLOCKS):
+        super().__init__()
+        self.source_url = url
+        self.url = url
+        self.size = size
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self._pos = 0
+        self._blocks = OrderedDict()
+        self._tail_start = size
+        self._tail = b""
+        self._pending = {}
+        self._stats_lock = threading.Lock()
+        self.bytes_fetched = 0
+        self.fetch_failed = False
+    
+    @classmethod
+    def open(cls, url, tail_size=RANGE_TAIL_SIZE):
+        """Probe url with a suffix range request; return None if ranges aren't supported."""
+        with get_session().get(url, headers={'Range': f'bytes=-{tail_size}'}, stream=True, timeout=API_TIMEOUT) as response:
+            response.raise_for_status()
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            if response.status_code != 206 or not total.isdigit():
+                return None
+            tail = response.content
+            if len(tail) != min(tail_size, int(total)):
+                return None
+        
+        # Keep the post-redirect URL so later ranges skip the redirect hop
+        ranged = cls(response.url, int(total))
+        ranged.source_url = url
+        ranged._tail_start = ranged.size - len(tail)
+        ranged._tail = tail
+        ranged.bytes_fetched = len(tail)
+        return ranged
+    
+    def close(self):
+        self._cancel_pending()
+        super().close()
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self._pos
+        
+        # ZipFile treats short reads as corruption, so loop until satisfied
+        chunks = []
+        while size > 0 and self._pos < self.size:
+            if self._pos >= self._tail_start:
+                data = memoryview(self._tail)[self._pos - self._tail_start:]
+            else:
+                start = self._pos - self._pos % self.block_size
+                data = memoryview(self._get_block(start))[self._pos - start:]
+            chunk = data[:size]
+            if not chunk:
+                raise OSError(f"No data available at offset {self._pos}")
+            chunks.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+    
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def _get_block(self, start):
+        if self.fetch_failed:
+            raise OSError("Streaming download failed; no further ranges will be requested")
+        block = self._blocks.get(start)
+        if block is None:
+            pending = self._pending.pop(start, None)
+            try:
+                block = pending.result() if pending is not None else self._fetch_block(start)
+            except OSError:
+                self.fetch_failed = True
+                self._cancel_pending()
+                raise
+            self._blocks[start] = block
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(start)
+        self._read_ahead(start)
+        return block
+    
+    def _read_ahead(self, start):
+        for i in range(1, RANGE_READ_AHEAD + 1):
+            next_start = start + i * self.block_size
+            if next_start >= self._tail_start or len(self._pending) >= 2 * RANGE_READ_AHEAD:
+                break
+            if next_start not in self._blocks and next_start not in self._pending:
+                self._pending[next_start] = run_in_background(self._fetch_block, next_start, True)
+    
+    def _cancel_pending(self):
+        for pending in self._pending.values():
+            pending.cancel()
+        self._pending.clear()
+    
+    def _fetch_block(self, start, backoff=False):
+        end = min(start + self.block_size, self.size) - 1
+        for attempt in range(1, RANGE_RETRIES + 1):
+            if self.fetch_failed:
+                raise OSError("Streaming download failed; no further ranges will be requested")
+            try:
+                block = self._fetch(start, end)
+            except OSError:  # includes requests' RequestException
+                if attempt == RANGE_RETRIES:
+                    self.fetch_failed = True
+                    raise
+                if backoff:
+                    time.sleep(attempt)
+            else:
+                with self._stats_lock:
+                    self.bytes_fetched += len(block)
+                return block
+    
+    def _fetch(self, start, end):
+        headers = {'Range': f'bytes={start}-{end}'}
+        response = get_session().get(self.url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+        if response.status_code in (401, 403, 404) and self.url != self.source_url:
+            # The signed redirect URL expired; resolve it again
+            response.close()
+            response = get_session().get(self.source_url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+            self.url = response.url
+        with response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise OSError(f"Server ignored range request (HTTP {response.status_code})")
+            content = response.content
+            content_range = response.headers.get('Content-Range', '')
+            if not content_range.startswith(f"bytes {start}-") or len(content) != end - start + 1:
+                raise OSError(f"Incomplete range response for bytes {start}-{end} ({len(content)} bytes)")
+            return content
+
+def get_config_dir():
+    """Return the HP Py Sleep Application Support directory (same logic as main.py)."""
+    return os.path.join(os.path.expanduser("~"), "Library", "Application Support", "HP Py Sleep")
+
+def load_json(data):
+    """Parse JSON bytes, using orjson when it is installed."""
+    # Imported here: loading orjson also pulls in datetime, uuid and zoneinfo
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data)
+    return orjson.loads(data)
+
+def _release_cache_paths():
+    """Return the (body, etag) paths of the cached latest-release response."""
+    config_dir = get_config_dir()
+    return (os.path.join(config_dir, "release_cache.json"),
+            os.path.join(config_dir, "release_cache.etag"))
+
+def clear_release_cache():
+    """Delete the cached release response so the next lookup is unconditional."""
+    for path in _release_cache_paths():
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def save_release_cache(body, etag):
+    """Store a release response and its ETag; best-effort, errors are ignored.
+    
+    The old ETag is removed first and the body is swapped in atomically
+    before the new ETag is written, so a 304 is never matched to a torn or
+    mismatched body. Without an ETag the stale cache is only cleared.
+    """
+    cache_file, etag_file = _release_cache_paths()
+    try:
+        if not etag:
+            clear_release_cache()
+            return
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        clear_release_cache()
+        for path, data in ((cache_file, body), (etag_file, etag.encode('utf-8'))):
+            tmp_path = f"{path}.tmp.{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    except OSError:
+        pass  # The next run simply refetches
+
+def fetch_latest_release():
+    """Fetch the latest release JSON from GitHub without printing anything.
+    
+    The last response and its ETag are cached next to the config file so
+    repeat runs send a conditional request and reuse the cached body on 304.
+    Nothing is written to disk here: returns (release_data, from_cache,
+    cache_entry), where cache_entry is the (body, etag) to hand to
+    save_release_cache() or None. Network and parse errors propagate.
+    """
+    url = f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/releases/latest"
+    cache_file, etag_file = _release_cache_paths()
+    
+    headers = {'Accept': 'application/vnd.github+json'}
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_body = f.read()
+        with open(etag_file, 'r') as f:
+            headers['If-None-Match'] = f.read().strip()
+    except OSError:
+        cached_body = None
+    
+    response = get_session().get(url, headers=headers, timeout=API_TIMEOUT)
+    
+    if response.status_code == 304 and cached_body is not None:
+        try:
+            return load_json(cached_body), True, None
+        except ValueError:
+            # Damaged cache; ask for the full body again, it is replaced on save
+            headers.pop('If-None-Match', None)
+            response = get_session().get(url, headers=headers, timeout=API_TIMEOUT)
+    
+    response.raise_for_status()
+    release_data = load_json(response.content)
+    
+    return release_data, False, (response.content, response.headers.get('ETag'))
+
+def start_release_lookup():
+    """Run fetch_latest_release() in the background and return its Future."""
+    return run_in_background(fetch_latest_release)
+
+def get_latest_release(pending=None):
+    """Get information about the latest release from GitHub.
+    
+    ``pending`` may be a Future from start_release_lookup(), in which case
+    its result is used instead of issuing a new request. The release cache
+    is only updated here, once the user has agreed to continue.
+    """
+    try:
+        import requests
+    except ImportError:
+        print("❌ The 'requests' module is required but not installed.")
+        print("💡 Install it with: pip install requests")
+        return None
+    
     try:
         print("🔍 Checking for latest release...")
-        url = f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/releases/latest"
         
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
+        if pending is not None:
+            release_data, from_cache, cache_entry = pending.result()
+        else:
+            release_data, from_cache, cache_entry = fetch_latest_release()
+        
+        if cache_entry is not None:
+            save_release_cache(*cache_entry)
         
-        release_data = response.json()
+        if from_cache:
+            print("ℹ️  Release information unchanged since last check")
         
         print(f"✅ Found latest release: {release_data['tag_name']}")
         print(f"📅 Published: {release_data['published_at']}")
@@ -46,8 +458,41 @@ def get_latest_release():
         print(f"❌ Error parsing release data: {e}")
         return None
 
-def download_release_asset(release_data, asset_name_pattern="hp_py_sleep"):
-    """Download the release asset (ZIP file)."""
+def _progress_poller(get_downloaded, total_size, stop):
+    """Redraw the download progress line every PROGRESS_INTERVAL seconds until stopped."""
+    while True:
+        stopped = stop.wait(PROGRESS_INTERVAL)
+        downloaded = min(get_downloaded(), total_size)
+        progress = (downloaded / total_size) * 100 if total_size else 100.0
+        print(f"\r📥 Downloading: {progress:.1f}% ({downloaded:,} / {total_size:,} bytes)", end='', flush=True)
+        if stopped:
+            print()  # New line after progress
+            return
+
+def start_progress(get_downloaded, total_size):
+    """Show download progress on a helper thread; returns a function that stops it."""
+    stop = threading.Event()
+    if not sys.stdout.isatty():
+        return stop.set
+    
+    poller = threading.Thread(target=_progress_poller, args=(get_downloaded, total_size, stop))
+    poller.start()
+    
+    def finish():
+        stop.set()
+        poller.join()
+    return finish
+
+def download_release_asset(release_data, asset_name_pattern="hp_py_sleep", allow_ranged=True):
+    """Open the release asset (ZIP file) for extraction.
+    
+    Streams it with HTTP range requests when allowed and supported by the
+    server, and otherwise downloads it into an anonymous temporary file.
+    """
+    import requests
+    import shutil
+    import tempfile
+    
     try:
         # Find the asset that matches our pattern
         assets = release_data.get('assets', [])
@@ -65,33 +510,42 @@ def download_release_asset(release_data, asset_name_pattern="hp_py_sleep"):
                 print(f"  - {asset['name']}")
             return None
         
-        print(f"📥 Downloading: {target_asset['name']} ({target_asset['size']} bytes)")
+        url = target_asset['browser_download_url']
         
-        # Download the asset
-        response = requests.get(target_asset['browser_download_url'], stream=True, timeout=300)
-        response.raise_for_status()
+        # Prefer ranged reads so extraction can start before the whole asset lands
+        ranged_file = None
+        if allow_ranged:
+            try:
+                ranged_file = RangedHTTPFile.open(url)
+            except requests.exceptions.RequestException:
+                pass
+        if ranged_file is not None:
+            print(f"📥 Streaming: {target_asset['name']} ({target_asset['size']} bytes)")
+            return ranged_file
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+        print(f"📥 Downloading: {target_asset['name']} ({target_asset['size']} bytes)")
         
-        # Download with progress
+        # Anonymous temp file, removed on close. Not SpooledTemporaryFile:
+        # before Python 3.11 it lacks seekable(), which ZipFile needs
+        temp_file = tempfile.TemporaryFile(suffix='.zip')
         total_size = int(target_asset['size'])
-        downloaded = 0
         
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                temp_file.write(chunk)
-                downloaded += len(chunk)
-                
-                # Show progress
-                progress = (downloaded / total_size) * 100
-                print(f"\r📥 Downloading: {progress:.1f}% ({downloaded:,} / {total_size:,} bytes)", end='', flush=True)
+        with get_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            # Copy in C via shutil; progress is sampled from a separate thread
+            finish_progress = start_progress(temp_file.tell, total_size)
+            try:
+                shutil.copyfileobj(response.raw, temp_file, length=DOWNLOAD_CHUNK_SIZE)
+            finally:
+                finish_progress()
         
-        print()  # New line after progress
-        temp_file.close()
+        downloaded = temp_file.tell()
+        temp_file.seek(0)
         
-        print(f"✅ Download completed: {temp_file.name}")
-        return temp_file.name
+        print(f"✅ Download completed: {downloaded:,} bytes")
+        return temp_file
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Error downloading release: {e}")
@@ -100,56 +554,163 @@ def download_release_asset(release_data, asset_name_pattern="hp_py_sleep"):
         print(f"❌ Unexpected error during download: {e}")
         return None
 
-def extract_and_install(zip_file_path):
-    """Extract the ZIP file and install to Applications folder."""
+def find_app_prefix(members):
+    """Return the archive prefix of the shallowest .app bundle (e.g. "HP Py Sleep.app/"), or None."""
+    app_parts = None
+    for member in members:
+        parts = member.filename.rstrip('/').split('/')
+        for depth, part in enumerate(parts):
+            if part.endswith('.app') and (depth < len(parts) - 1 or member.is_dir()):
+                if app_parts is None or depth < len(app_parts) - 1:
+                    app_parts = parts[:depth + 1]
+                break
+    return '/'.join(app_parts) + '/' if app_parts else None
+
+def _extract_member(zip_ref, member, target, mode):
+    """Decompress one archive member to target, restoring its Unix permission bits."""
+    import shutil
+    
+    with zip_ref.open(member) as src, open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst, length=DOWNLOAD_CHUNK_SIZE)
+    if mode:
+        os.chmod(target, stat.S_IMODE(mode))
+
+def extract_app_members(zip_ref, prefix, dest_dir, max_workers=None):
+    """Extract the members under prefix straight into dest_dir using a thread pool.
+    
+    The prefix is stripped so dest_dir becomes the bundle itself. Unix modes
+    (e.g. the Contents/MacOS executable bit) and symlinks are restored from
+    the entries' external_attr, which ZipFile.extract would drop.
+    """
+    import zipfile
+    
+    dest_root = os.path.abspath(dest_dir)
+    os.makedirs(dest_root, exist_ok=True)
+    dir_modes = []
+    file_jobs = []
+    links = []
+    
+    # Create directories up front so worker threads never race on makedirs
+    for member in zip_ref.infolist():
+        if not member.filename.startswith(prefix) or member.filename == prefix:
+            continue
+        target = os.path.normpath(os.path.join(dest_root, member.filename[len(prefix):]))
+        if os.path.commonpath([dest_root, target]) != dest_root:
+            raise zipfile.BadZipFile(f"Unsafe path in archive: {member.filename}")
+        
+        mode = member.external_attr >> 16
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+            if mode:
+                dir_modes.append((target, stat.S_IMODE(mode)))
+        elif stat.S_ISLNK(mode):
+            links.append((member, target))
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            file_jobs.append((member, target, mode))
+    
+    # zlib releases the GIL while inflating, so members decompress concurrently
+    executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+    try:
+        futures = [executor.submit(_extract_member, zip_ref, member, target, mode)
+                   for member, target, mode in file_jobs]
+        for future in as_completed(futures):
+            future.result()
+    finally:
+        # On the first failure (or Ctrl-C) drop the queued members instead of
+        # extracting them all; running ones finish before staging is cleaned up
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    # Symlinks last, so no extracted file is ever written through one
+    for member, target in links:
+        link_target = zip_ref.read(member).decode('utf-8')
+        resolved = os.path.normpath(os.path.join(os.path.dirname(target), link_target))
+        if os.path.isabs(link_target) or os.path.commonpath([dest_root, resolved]) != dest_root:
+            raise zipfile.BadZipFile(f"Unsafe symlink in archive: {member.filename}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.symlink(link_target, target)
+    
+    for target, mode in dir_modes:
+        os.chmod(target, mode)
+
+def extract_and_install(zip_file):
+    """Extract the downloaded ZIP file object and install to Applications folder."""
+    import shutil
+    import zipfile
+    
     try:
-        print("📦 Extracting application...")
-        
-        # Create temporary directory for extraction
-        temp_dir = tempfile.mkdtemp()
-        
-        # Extract ZIP file
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        # Find the .app file
-        app_files = list(Path(temp_dir).rglob("*.app"))
-        
-        if not app_files:
-            print("❌ No .app file found in the downloaded package")
-            print("Contents of extracted package:")
-            for item in Path(temp_dir).rglob("*"):
-                print(f"  - {item}")
-            return False
-        
-        # Use the first .app file found
-        source_app = app_files[0]
-        app_name = source_app.name
-        
-        print(f"📱 Found application: {app_name}")
-        
         # Determine Applications folder
         if sys.platform == "darwin":  # macOS
-            applications_dir = Path("/Applications")
+            applications_dir = "/Applications"
         else:
             print("❌ This script is designed for macOS only")
             return False
         
-        # Target path in Applications
-        target_path = applications_dir / app_name
-        
-        # Remove existing installation if it exists
-        if target_path.exists():
-            print(f"🗑️  Removing existing installation: {target_path}")
-            shutil.rmtree(target_path)
-        
-        # Copy to Applications folder
-        print(f"📋 Installing to: {target_path}")
-        shutil.copytree(source_app, target_path)
+        print("📦 Extracting application...")
         
-        # Clean up temporary files
-        shutil.rmtree(temp_dir)
-        os.unlink(zip_file_path)
+        with zip_file, zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            members = zip_ref.infolist()
+            app_prefix = find_app_prefix(members)
+            
+            if app_prefix is None:
+                print("❌ No .app file found in the downloaded package")
+                print("Contents of downloaded package:")
+                for member in members:
+                    print(f"  - {member.filename}")
+                return False
+            
+            app_name = os.path.basename(app_prefix.rstrip('/'))
+            print(f"📱 Found application: {app_name}")
+            
+            # Target path in Applications, plus a hidden sibling to extract into
+            target_path = os.path.join(applications_dir, app_name)
+            staging_path = os.path.join(applications_dir, f".{app_name}.new")
+            shutil.rmtree(staging_path, ignore_errors=True)  # left over from an interrupted run
+            
+            # Extract the bundle straight into the Applications folder
+            print(f"📋 Installing to: {target_path}")
+            finish_progress = None
+            if isinstance(zip_file, RangedHTTPFile):
+                finish_progress = start_progress(lambda: zip_file.bytes_fetched, zip_file.size)
+            try:
+                extract_app_members(zip_ref, app_prefix, staging_path)
+            except BaseException:
+                shutil.rmtree(staging_path, ignore_errors=True)
+                raise
+            finally:
+                if finish_progress is not None:
+                    finish_progress()
+        
+        # Move any existing installation aside with a single rename and
+        # delete it in the background once the new bundle is in place
+        old_trash = os.path.join(applications_dir, f".{app_name}.old.{os.getpid()}")
+        try:
+            try:
+                os.rename(target_path, old_trash)
+            except FileNotFoundError:
+                old_trash = None
+            except OSError:
+                old_trash = None
+                print(f"🗑️  Removing existing installation: {target_path}")
+                shutil.rmtree(target_path)
+            else:
+                print(f"🗑️  Removing existing installation: {target_path}")
+            
+            os.rename(staging_path, target_path)
+        except BaseException:
+            # Put the previous installation back and drop the new bundle
+            if old_trash is not None:
+                try:
+                    os.rename(old_trash, target_path)
+                except OSError:
+                    print(f"⚠️  Previous installation left at: {old_trash}")
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        
+        if old_trash is not None:
+            # Not a daemon thread, so the delete finishes before the interpreter exits
+            threading.Thread(target=shutil.rmtree, args=(old_trash,),
+                             kwargs={'ignore_errors': True}).start()
         
         print(f"✅ Installation completed successfully!")
         return True
@@ -165,21 +726,77 @@ def extract_and_install(zip_file_path):
         print(f"❌ Error during installation: {e}")
         return False
 
+def render_default_config():
+    """Return the default configuration bytes stamped with the current time."""
+    from datetime import datetime
+    
+    timestamp = datetime.now().isoformat().encode('ascii')
+    return DEFAULT_CONFIG_TEMPLATE.replace(b"__TS__", timestamp, 1)
+
+def full_fsync(fd):
+    """Flush a file to stable storage (F_FULLFSYNC on macOS, fsync elsewhere)."""
+    try:
+        import fcntl
+        fcntl.fcntl(fd, fcntl.F_FULLFSYNC)
+    except (ImportError, AttributeError, OSError):
+        os.fsync(fd)
+
+def write_new_file_atomic(path, data):
+    """Atomically create path containing data; return False if it already exists.
+    
+    The data is written and synced to a sibling temp file which is then
+    published in one step, so readers never see a partially written file.
+    On filesystems without hard links the file is instead created in place,
+    which is not atomic; if that write fails the partial file is removed.
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            full_fsync(f.fileno())
+        
+        # link() refuses to replace an existing file, unlike os.replace()
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # Filesystem without hard links (e.g. SMB, exFAT); an exclusive
+            # create still never overwrites a file that appeared meanwhile
+            try:
+                f = open(path, 'xb')
+            except FileExistsError:
+                return False
+            try:
+                with f:
+                    f.write(data)
+                    f.flush()
+                    full_fsync(f.fileno())
+            except BaseException:
+                # A torn config would otherwise be "preserved" by every later run
+                os.unlink(path)
+                raise
+        return True
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+
 def setup_default_config():
     """Setup default configuration file for first-time users."""
     try:
         print("⚙️  Setting up configuration...")
         
-        # Get the config file path (same logic as main.py)
-        home_dir = Path.home()
-        config_dir = home_dir / "Library" / "Application Support" / "HP Py Sleep"
-        config_file = config_dir / "hp_processor_config.json"
+        config_dir = get_config_dir()
+        config_file = os.path.join(config_dir, "hp_processor_config.json")
         
         # Create config directory if it doesn't exist
-        config_dir.mkdir(parents=True, exist_ok=True)
+        os.makedirs(config_dir, exist_ok=True)
         
         # Check if config file already exists
-        if config_file.exists():
+        if os.path.exists(config_file):
             print(f"✅ Configuration file already exists: {config_file}")
             print("ℹ️  Preserving existing configuration")
             return True
@@ -187,54 +804,25 @@ def setup_default_config():
         # Create default configuration
         print(f"📝 Creating default configuration file...")
         
-        default_config = {
-            "app_name": "HP Py Sleep",
-            "version": "1.0.0",
-            "created_by": "setup_hp_py_sleep.py",
-            "created_timestamp": datetime.now().isoformat(),
-            "window_geometry": "",
-            "selected_signals": [],
-            "event_types": {
-                "Start": "green",
-                "Stop": "red",
-                "Error": "orange"
-            },
-            "state_types": {
-                "Recording": "blue",
-                "Paused": "yellow",
-                "Processing": "purple"
-            },
-            "trace_assignments": {},
-            "saved_montages": [],
-            "last_montage_name": None,
-            "last_h5_path_var": "",
-            "auto_output": False,
-            "load_mode": "all",
-            "max_samples": "1000",
-            "autoscale": "resize",
-            "anti_alias": False,
-            "remove_dc": False,
-            "window_size": "5 min",
-            "use_icons": True,
-            "dark_mode": False,
-            "note": "This configuration file was created by the HP Py Sleep setup script"
-        }
-        
-        with open(config_file, 'w') as f:
-            json.dump(default_config, f, indent=2)
+        # Rendered once; the template below is written from the same bytes
+        payload = render_default_config()
+        
+        if not write_new_file_atomic(config_file, payload):
+            print(f"✅ Configuration file already exists: {config_file}")
+            print("ℹ️  Preserving existing configuration")
+            return True
         
         print(f"✅ Created default configuration: {config_file}")
-        print(f"   Default event types: {', '.join(default_config['event_types'].keys())}")
-        print(f"   Default state types: {', '.join(default_config['state_types'].keys())}")
+        print(f"   Default event types: {', '.join(name for name, _ in DEFAULT_EVENT_TYPES)}")
+        print(f"   Default state types: {', '.join(name for name, _ in DEFAULT_STATE_TYPES)}")
         
         # Also create the template file for future use
-        template_file = config_dir / "default_config_template.json"
-        if not template_file.exists():
+        template_file = os.path.join(config_dir, "default_config_template.json")
+        if not os.path.exists(template_file):
             print(f"📝 Creating config template for future resets...")
-            with open(template_file, 'w') as f:
-                json.dump(default_config, f, indent=2)
-            print(f"✅ Created template: {template_file}")
-            print(f"ℹ️  You can edit this template to customize default settings")
+            if write_new_file_atomic(template_file, payload):
+                print(f"✅ Created template: {template_file}")
+                print(f"ℹ️  You can edit this template to customize default settings")
         
         return True
         
@@ -244,10 +832,7 @@ def setup_default_config():
 
 def main():
     """Main setup function."""
-    print("=" * 60)
-    print("🚀 HP Py Sleep - First Time Setup")
-    print("=" * 60)
-    print()
+    sys.stdout.write(BANNER_START)
     
     # Check if we're on macOS
     if sys.platform != "darwin":
@@ -256,20 +841,10 @@ def main():
         print(f"https://github.com/{GITHUB_REPO}/releases")
         return False
     
-    # Check if requests module is available
-    try:
-        import requests
-    except ImportError:
-        print("❌ The 'requests' module is required but not installed.")
-        print("💡 Install it with: pip install requests")
-        return False
+    # Look up the release in the background while the user reads the prompt
+    release_future = start_release_lookup()
     
-    print("📋 This script will:")
-    print("   1. Download the latest HP Py Sleep release from GitHub")
-    print("   2. Install it to your Applications folder")
-    print("   3. Set up default configuration file (if needed)")
-    print("   4. Prepare the application for first-time use")
-    print()
+    sys.stdout.write(SETUP_PLAN)
     
     # Get user confirmation
     response = input("Continue? (y/N): ").strip().lower()
@@ -280,7 +855,7 @@ def main():
     print()
     
     # Step 1: Get latest release info
-    release_data = get_latest_release()
+    release_data = get_latest_release(release_future)
     if not release_data:
         return False
     
@@ -296,6 +871,13 @@ def main():
     # Step 3: Extract and install
     success = extract_and_install(zip_file)
     
+    if not success and getattr(zip_file, 'fetch_failed', False):
+        # The streamed install hit network errors; try once more the slow way
+        print()
+        print("⚠️  Streaming download failed, retrying with a full download")
+        zip_file = download_release_asset(release_data, allow_ranged=False)
+        success = bool(zip_file) and extract_and_install(zip_file)
+    
     if success:
         print()
         
@@ -305,28 +887,7 @@ def main():
         if not config_success:
             print("⚠️  Configuration setup failed, but app installation succeeded")
             print("   The app will create its own config file on first launch")
-        print()
-        print("=" * 60)
-        print("🎉 Setup Completed Successfully!")
-        print("=" * 60)
-        print()
-        print("📱 HP Py Sleep has been installed to your Applications folder.")
-        print("🔍 You can find it by:")
-        print("   - Opening Finder")
-        print("   - Going to Applications")
-        print("   - Looking for 'HP Py Sleep'")
-        print()
-        print("🚀 To launch the application:")
-        print("   - Double-click the app in Applications, or")
-        print("   - Use Spotlight (Cmd+Space) and search for 'HP Py Sleep'")
-        print()
-        print("🔄 Future updates:")
-        print("   - The app will automatically check for updates on startup")
-        print("   - You can manually check for updates from within the app")
-        print()
-        print("📚 For more information, visit:")
-        print(f"   https://github.com/{GITHUB_REPO}")
-        print()
+        sys.stdout.write(BANNER_COMPLETE)
         
         # Ask if user wants to launch the app
         launch_response = input("🚀 Launch HP Py Sleep now? (y/N): ").strip().lower()